@@ -51,6 +51,13 @@ typing_deps = [
     "types-requests",
 ]
 
+speedups_deps = [
+    # Faster parsing of widget content, see zulipterminal/widget.py
+    # (a CPython extension; recent versions also require Python 3.8+)
+    "msgspec>=0.18.0; python_version >= '3.8'"
+    " and platform_python_implementation == 'CPython'",
+]
+
 helper_deps = [
     "pudb==2022.1.1",
     "snakeviz>=2.1.1",
@@ -96,12 +103,20 @@ setup(
         ],
     },
     extras_require={
-        "dev": testing_deps + linting_deps + typing_deps + helper_deps + gitlint_deps,
+        "dev": (
+            testing_deps
+            + linting_deps
+            + typing_deps
+            + helper_deps
+            + gitlint_deps
+            + speedups_deps
+        ),
         "testing": testing_deps,
         "testing-minimal": testing_minimal_deps,  # extra must be hyphenated
         "linting": linting_deps,
         "gitlint": gitlint_deps,
         "typing": typing_deps,
+        "speedups": speedups_deps,
     },
     tests_require=testing_deps,
     install_requires=[
@@ -244,12 +244,14 @@ def submessage_factory() -> "Callable[..., Submessage]":
 
     def _factory(
         id: int = 1,
+        message_id: int = 1,
         sender_id: int = 1001,
         content: str = "",
         msg_type: str = "widget",
     ) -> Submessage:
         return {
             "id": id,
+            "message_id": message_id,
             "sender_id": sender_id,
             "content": content,
             "msg_type": msg_type,
@@ -3178,6 +3178,7 @@ class TestModel:
                     },
                     {
                         "id": 1,
+                        "message_id": 1958326,
                         "sender_id": 27294,
                         "content": '{"type":"strike","key":"0,canned"}',
                         "msg_type": "widget",
@@ -3241,6 +3242,7 @@ class TestModel:
                     },
                     {
                         "id": 12185,
+                        "message_id": 1958326,
                         "sender_id": 27294,
                         "content": (
                             '{"type":"new_task","key":2,"task":"Make a coffee",'
@@ -3274,6 +3276,7 @@ class TestModel:
                     },
                     {
                         "id": 12185,
+                        "message_id": 1958326,
                         "sender_id": 27294,
                         "content": (
                             '{"type":"new_task","key":2,"task":"Make a coffee"'
@@ -3316,6 +3319,7 @@ class TestModel:
                     },
                     {
                         "id": 12185,
+                        "message_id": 1958326,
                         "sender_id": 27294,
                         "content": (
                             '{"type":"new_task","key":2,"task":"Make a coffee"'
@@ -3325,6 +3329,7 @@ class TestModel:
                     },
                     {
                         "id": 12186,
+                        "message_id": 1958326,
                         "sender_id": 27294,
                         "content": (
                             '{"type":"new_task_list_title",'
@@ -1,8 +1,10 @@
-from typing import Dict, List, Union
+import json
+from typing import Any, Callable, Dict, List, Union
 
 import pytest
 from pytest import param as case
 
+from zulipterminal import widget
 from zulipterminal.api_types import Submessage
 from zulipterminal.widget import (
     find_widget_type,
@@ -11,6 +13,13 @@ from zulipterminal.widget import (
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_widget_caches() -> None:
+    widget._todo_cache.clear()
+    widget._poll_cache.clear()
+    widget._parse_content.cache_clear()
+
+
 @pytest.mark.parametrize(
     "submessages, expected_widget_type",
     [
@@ -63,6 +72,84 @@ from zulipterminal.widget import (
             "todo",
         ),
         case([{}], "unknown"),
+        case(
+            [
+                {
+                    "id": 11901,
+                    "message_id": 1954465,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": '{"type":"new_option","idx":1,"option":"Maybe"}',
+                },
+            ],
+            "unknown",
+            id="no_widget_type_key",
+        ),
+        case(
+            [
+                {
+                    "id": 11902,
+                    "message_id": 1954466,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": '{"widget_type" :\n  "poll", "extra_data": null}',
+                },
+            ],
+            "poll",
+            id="whitespace_around_widget_type",
+        ),
+        case(
+            [
+                {
+                    "id": 11903,
+                    "message_id": 1954467,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": '{"widget_type": "to\\u0064o", "extra_data": null}',
+                },
+            ],
+            "todo",
+            id="escaped_widget_type",
+        ),
+        case(
+            [
+                {
+                    "id": 11904,
+                    "message_id": 1954468,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": '{"widget_type": poll}',
+                },
+            ],
+            "unknown",
+            id="invalid_json",
+        ),
+        case(
+            [
+                {
+                    "id": 11905,
+                    "message_id": 1954469,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": '{"extra_data": {"widget_type": "poll"}, "type": "x"}',
+                },
+            ],
+            "unknown",
+            id="nested_widget_type",
+        ),
+        case(
+            [
+                {
+                    "id": 11906,
+                    "message_id": 1954470,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": '{"extra_data": null, "widget_type": "todo"}',
+                },
+            ],
+            "todo",
+            id="widget_type_not_first_key",
+        ),
     ],
 )
 def test_find_widget_type(
@@ -337,6 +424,62 @@ def test_find_widget_type(
             },
             id="updated_title_and_finished_tasks",
         ),
+        case(
+            [
+                {
+                    "id": 12146,
+                    "message_id": 1958320,
+                    "sender_id": 27294,
+                    "msg_type": "other",
+                    "content": "{}",
+                },
+                {
+                    "id": 12147,
+                    "message_id": 1958320,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": (
+                        '{"widget_type": "todo", "extra_data": '
+                        '{"task_list_title": "Late", "tasks": [{"task": "Hey", '
+                        '"desc": ""}]}}'
+                    ),
+                },
+            ],
+            "Late",
+            {
+                "0,canned": {"task": "Hey", "desc": "", "completed": False},
+            },
+            id="creation_not_first_submessage",
+        ),
+        case(
+            [
+                {
+                    "id": 12148,
+                    "message_id": 1958322,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": (
+                        '{"widget_type": "todo", "extra_data": '
+                        '{"task_list_title": "Nulls", "tasks": []}}'
+                    ),
+                },
+                {
+                    "id": 12149,
+                    "message_id": 1958322,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": (
+                        '{"type":"new_task","key":1,"task":"Eat","desc":null,'
+                        '"completed":false}'
+                    ),
+                },
+            ],
+            "Nulls",
+            {
+                "1,27294": {"task": "Eat", "desc": None, "completed": False},
+            },
+            id="null_task_description",
+        ),
     ],
 )
 def test_process_todo_widget(
@@ -652,6 +795,78 @@ def test_process_todo_widget(
             },
             id="multiple_voters",
         ),
+        case(
+            [
+                {
+                    "id": 12113,
+                    "message_id": 1957730,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": (
+                        '{"widget_type": "poll", "extra_data": {"question": "Are'
+                        ' repeated votes ignored?", "options": ["Yes", "No"]}}'
+                    ),
+                },
+                {
+                    "id": 12114,
+                    "message_id": 1957730,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": '{"type":"vote","key":"canned,0","vote":1}',
+                },
+                {
+                    "id": 12115,
+                    "message_id": 1957730,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": '{"type":"vote","key":"canned,0","vote":1}',
+                },
+                {
+                    "id": 12116,
+                    "message_id": 1957730,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": '{"type":"vote","key":"canned,1","vote":-1}',
+                },
+                {
+                    "id": 12117,
+                    "message_id": 1957730,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": '{"type":"vote","key":"canned,2","vote":1}',
+                },
+            ],
+            "Are repeated votes ignored?",
+            {
+                "canned,0": {"option": "Yes", "votes": [27294]},
+                "canned,1": {"option": "No", "votes": []},
+            },
+            id="repeated_and_unmatched_votes",
+        ),
+        case(
+            [
+                {
+                    "id": 12118,
+                    "message_id": 1957731,
+                    "sender_id": 27294,
+                    "msg_type": "widget",
+                    "content": (
+                        '{"widget_type": "poll", "extra_data": {"question": "Are'
+                        ' other submessages skipped?", "options": ["Yes"]}}'
+                    ),
+                },
+                {
+                    "id": 12119,
+                    "message_id": 1957731,
+                    "sender_id": 27294,
+                    "msg_type": "other",
+                    "content": '{"type":"vote","key":"canned,0","vote":1}',
+                },
+            ],
+            "Are other submessages skipped?",
+            {"canned,0": {"option": "Yes", "votes": []}},
+            id="non_widget_submessage",
+        ),
     ],
 )
 def test_process_poll_widget(
@@ -663,3 +878,217 @@ def test_process_poll_widget(
 
     assert result["question"] == expected_poll_question
     assert result["options"] == expected_options
+
+
+def test_process_todo_widget__resumes_from_cached_state() -> None:
+    submessages: List[Submessage] = [
+        {
+            "id": 12150,
+            "message_id": 1958400,
+            "sender_id": 27294,
+            "msg_type": "widget",
+            "content": (
+                '{"widget_type": "todo", "extra_data": '
+                '{"task_list_title": "Cached", "tasks": [{"task": "A", "desc": ""}]}}'
+            ),
+        },
+    ]
+    process_todo_widget(submessages)
+    submessages.append(
+        {
+            "id": 12151,
+            "message_id": 1958400,
+            "sender_id": 27294,
+            "msg_type": "widget",
+            "content": '{"type":"strike","key":"0,canned"}',
+        }
+    )
+
+    result = process_todo_widget(submessages)
+
+    assert result["tasks"] == {
+        "0,canned": {"task": "A", "desc": "", "completed": True},
+    }
+    assert result == process_todo_widget(submessages, use_cache=False)
+    # Processing again without changes must not re-apply the strike
+    assert process_todo_widget(submessages) == result
+
+
+def test_process_poll_widget__ignores_stale_cached_state() -> None:
+    creation: Submessage = {
+        "id": 12160,
+        "message_id": 1958410,
+        "sender_id": 27294,
+        "msg_type": "widget",
+        "content": (
+            '{"widget_type": "poll", "extra_data": '
+            '{"question": "Cached?", "options": ["Yes", "No"]}}'
+        ),
+    }
+    first_vote: Submessage = {
+        "id": 12161,
+        "message_id": 1958410,
+        "sender_id": 27294,
+        "msg_type": "widget",
+        "content": '{"type":"vote","key":"canned,0","vote":1}',
+    }
+    other_vote: Submessage = {
+        "id": 12162,
+        "message_id": 1958410,
+        "sender_id": 27294,
+        "msg_type": "widget",
+        "content": '{"type":"vote","key":"canned,1","vote":1}',
+    }
+    process_poll_widget([creation, first_vote])
+
+    result = process_poll_widget([creation, other_vote])
+
+    assert result["options"] == {
+        "canned,0": {"option": "Yes", "votes": []},
+        "canned,1": {"option": "No", "votes": [27294]},
+    }
+
+
+def test_process_poll_widget__evicts_least_recently_used_state(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(widget, "_STATE_CACHE_SIZE", 2)
+    polls: List[List[Submessage]] = [
+        [
+            {
+                "id": 12170 + message_id,
+                "message_id": message_id,
+                "sender_id": 27294,
+                "msg_type": "widget",
+                "content": (
+                    '{"widget_type": "poll", "extra_data": '
+                    '{"question": "Evicted?", "options": ["Yes"]}}'
+                ),
+            }
+        ]
+        for message_id in range(1958420, 1958423)
+    ]
+
+    process_poll_widget(polls[0])
+    process_poll_widget(polls[1])
+    process_poll_widget(polls[0])  # Now more recently used than polls[1]
+    process_poll_widget(polls[2])
+
+    assert list(widget._poll_cache) == [1958420, 1958422]
+
+
+def test_process_todo_widget__shares_recurring_task_texts() -> None:
+    submessages: List[Submessage] = [
+        {
+            "id": 12180 + key,
+            "message_id": 1958430,
+            "sender_id": 27294,
+            "msg_type": "widget",
+            "content": f'{{"type":"new_task","key":{key},"task":"Bug","desc":""}}',
+        }
+        for key in range(2)
+    ]
+
+    tasks = process_todo_widget(submessages)["tasks"]
+
+    assert tasks["0,27294"]["task"] is tasks["1,27294"]["task"]
+
+
+def _stdlib_loads() -> Callable[[str], Any]:
+    return json.JSONDecoder().decode
+
+
+def _orjson_loads() -> Callable[[str], Any]:
+    return pytest.importorskip("orjson").loads
+
+
+def _msgspec_loads() -> Callable[[str], Any]:
+    return pytest.importorskip("msgspec").json.Decoder().decode
+
+
+@pytest.mark.parametrize(
+    "loads_factory",
+    [
+        case(_stdlib_loads, id="json"),
+        case(_orjson_loads, id="orjson"),
+        case(_msgspec_loads, id="msgspec"),
+    ],
+)
+def test_widget_processing__json_backends(
+    monkeypatch: pytest.MonkeyPatch, loads_factory: Callable[[], Callable[[str], Any]]
+) -> None:
+    monkeypatch.setattr(widget, "_loads", loads_factory())
+    submessages: List[Submessage] = [
+        {
+            "id": 12190,
+            "message_id": 1958440,
+            "sender_id": 27294,
+            "msg_type": "widget",
+            # Escaped widget_type, so only read correctly by parsing
+            "content": (
+                '{"widget_type": "p\\u006fll", "extra_data": '
+                '{"question": "Parsed?", "options": ["Yes"]}}'
+            ),
+        },
+        {
+            "id": 12191,
+            "message_id": 1958440,
+            "sender_id": 27294,
+            "msg_type": "widget",
+            "content": '{"type":"vote","key":"canned,0","vote":1}',
+        },
+    ]
+    invalid: List[Submessage] = [
+        {
+            "id": 12192,
+            "message_id": 1958441,
+            "sender_id": 27294,
+            "msg_type": "widget",
+            "content": '{"widget_type": poll}',
+        }
+    ]
+
+    assert find_widget_type(submessages) == "poll"
+    assert find_widget_type(invalid) == "unknown"
+    assert process_poll_widget(submessages) == {
+        "question": "Parsed?",
+        "options": {"canned,0": {"option": "Yes", "votes": [27294]}},
+    }
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        case(
+            '{"widget_type": "poll", "extra_data": {"question": "Q", "options": ["a"]',
+            id="poll",
+        ),
+        case(
+            '{"widget_type": "todo", "extra_data": {"task_list_title": "T"',
+            id="todo",
+        ),
+    ],
+)
+def test_widget_processing__leading_widget_type_with_invalid_remainder(
+    content: str,
+) -> None:
+    submessages: List[Submessage] = [
+        {
+            "id": 12195,
+            "message_id": 1958450,
+            "sender_id": 27294,
+            "msg_type": "widget",
+            "content": content,
+        },
+        {
+            "id": 12196,
+            "message_id": 1958450,
+            "sender_id": 27294,
+            "msg_type": "widget",
+            "content": '{"type":"vote","key":"canned,0"',
+        },
+    ]
+
+    assert find_widget_type(submessages) == "unknown"
+    assert process_poll_widget(submessages) == {"question": "", "options": {}}
+    assert process_todo_widget(submessages) == {"title": "", "tasks": {}}
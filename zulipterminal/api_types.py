@@ -192,6 +192,7 @@ class SubscriptionSettingChange(TypedDict):
 
 class Submessage(TypedDict):
     id: int
+    message_id: int
     sender_id: int
     content: str
     msg_type: str
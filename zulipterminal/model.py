@@ -1890,6 +1890,7 @@ class Model:
             message["submessages"].append(
                 {
                     "id": event["submessage_id"],
+                    "message_id": message_id,
                     "sender_id": event["sender_id"],
                     "content": event["content"],
                     "msg_type": event["msg_type"],
@@ -6,7 +6,11 @@ typed results that mypy can validate end-to-end.
 """
 
 import json
-from typing import Any, Dict, List, Union, cast
+import sys
+from collections import OrderedDict
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, TypeVar, Union
 
 from zulipterminal.api_types import (
     PollOption,
@@ -19,94 +23,385 @@ from zulipterminal.api_types import (
 )
 
 
+def _fastest_json_loads() -> Callable[[str], Any]:
+    """
+    Returns the fastest available function to parse submessage content.
+    msgspec (from the speedups extra) and orjson are optional, but are much
+    faster than the json module.
+    All of these raise subclasses of ValueError for invalid JSON.
+    """
+    try:
+        import msgspec
+    except ImportError:
+        pass
+    else:
+        # Reusing a single decoder avoids setting one up for each call
+        return msgspec.json.Decoder().decode
+
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        return orjson.loads
+
+    # As for msgspec, reuse a decoder; json.loads() checks its keyword
+    # arguments on each call before falling through to a shared decoder
+    return json.JSONDecoder().decode
+
+
+_loads = _fastest_json_loads()
+
+
+@lru_cache(maxsize=4096)
+def _parse_content(content: str) -> Any:
+    """
+    Returns the parsed content of a submessage, caching recent results.
+    Submessage content never changes, but the same content is re-parsed
+    whenever a widget is re-rendered without its cached state. The parsed
+    values are only read, never modified, so are safe to share.
+    (This is string and dict manipulation, so is not suited to Numba.)
+    """
+    return _loads(content)
+
+
+_submessage_fields = itemgetter("content", "sender_id", "msg_type")
+
+_WIDGET_TYPE_KEY = '"widget_type"'
+
+
 def find_widget_type(submessages: List[Submessage]) -> str:
     if submessages and "content" in submessages[0]:
         content = submessages[0]["content"]
 
         if isinstance(content, str):
+            # Content without the key cannot be a widget, so is not parsed.
+            # Other content is always parsed, so that invalid content is not
+            # reported as a widget; the parse is cached for processing it.
+            if _WIDGET_TYPE_KEY not in content:
+                return "unknown"
             try:
-                loaded_content = json.loads(content)
+                loaded_content = _parse_content(content)
                 return loaded_content.get("widget_type", "unknown")
-            except json.JSONDecodeError:
+            except ValueError:
                 return "unknown"
         return "unknown"
     return "unknown"
 
 
-def process_todo_widget(todo_list: List[Submessage]) -> TodoWidgetResult:
-    title: str = ""
-    tasks: Dict[str, TodoTask] = {}
+def _intern(text: Any) -> Any:
+    """
+    Returns an interned copy of text, if it is a str, so that recurring task
+    and option texts share one copy; these are short, so cheap to keep.
+    Other values are returned unchanged, since they come from user-supplied
+    JSON, which may have eg. null in place of a string.
+    """
+    return sys.intern(text) if isinstance(text, str) else text
+
+
+_TodoWidget = Union[RawTodoWidget, Dict[str, Any]]
+_PollWidget = Union[RawPollWidget, Dict[str, Any]]
+
+
+class _TodoState:
+    """
+    Tasks are stored in parallel lists rather than as a dict per task, with
+    the position of each task in the lists indexed by its task id.
+    """
+
+    def __init__(self) -> None:
+        self.title = ""
+        self.task_index: Dict[str, int] = {}
+        self.texts: List[str] = []
+        self.descs: List[str] = []
+        self.completed = bytearray()
+
+    def add_task(self, task_id: str, text: str, desc: str) -> None:
+        text = _intern(text)
+        desc = _intern(desc)
+        index = self.task_index.get(task_id)
+        if index is None:
+            self.task_index[task_id] = len(self.texts)
+            self.texts.append(text)
+            self.descs.append(desc)
+            self.completed.append(0)
+        else:
+            self.texts[index] = text
+            self.descs[index] = desc
+            self.completed[index] = 0
+
+    def tasks(self) -> Dict[str, TodoTask]:
+        return {
+            task_id: {
+                "task": self.texts[index],
+                "desc": self.descs[index],
+                "completed": bool(self.completed[index]),
+            }
+            for task_id, index in self.task_index.items()
+        }
+
+
+class _PollState:
+    """
+    Options are stored in parallel lists, like tasks in _TodoState.
+    The voters of each option are an insertion-ordered set (a dict with None
+    values), so that toggling a vote is O(1) while preserving vote order.
+    """
+
+    def __init__(self) -> None:
+        self.question = ""
+        self.option_index: Dict[str, int] = {}
+        self.texts: List[str] = []
+        self.votes: List[Dict[int, None]] = []
+
+    def add_option(self, option_id: str, text: str) -> None:
+        text = _intern(text)
+        index = self.option_index.get(option_id)
+        if index is None:
+            self.option_index[option_id] = len(self.texts)
+            self.texts.append(text)
+            self.votes.append({})
+        else:
+            self.texts[index] = text
+            self.votes[index] = {}
+
+    def options(self) -> Dict[str, PollOption]:
+        return {
+            option_id: {"option": self.texts[index], "votes": list(self.votes[index])}
+            for option_id, index in self.option_index.items()
+        }
+
+
+# Processed widget state by message id, with the number of submessages
+# processed and the id of the last of them, to only process later additions.
+# These are least-recently-used caches, bounded like that of _parse_content.
+_STATE_CACHE_SIZE = 4096
+_todo_cache: "OrderedDict[int, Tuple[int, int, _TodoState]]" = OrderedDict()
+_poll_cache: "OrderedDict[int, Tuple[int, int, _PollState]]" = OrderedDict()
+
+StateT = TypeVar("StateT", _TodoState, _PollState)
+
+
+def _resume_state(
+    cache: "OrderedDict[int, Tuple[int, int, StateT]]",
+    message_id: Optional[int],
+    submessages: List[Submessage],
+) -> Optional[Tuple[StateT, int]]:
+    """
+    Returns the cached state for the message and the number of submessages
+    it covers, if these submessages are still the start of the list.
+    The state is removed from the cache, so a failure part-way through
+    updating it cannot leave it cached in an inconsistent form.
+    Widgets are processed from both the main and event threads, so this
+    uses a single pop, which also gives the state to only one of them.
+    """
+    if message_id is None:
+        return None
+    entry = cache.pop(message_id, None)
+    if entry is None:
+        return None
+    processed, last_id, state = entry
+    if processed <= len(submessages) and submessages[processed - 1]["id"] == last_id:
+        return state, processed
+    return None
+
+
+def _store_state(
+    cache: "OrderedDict[int, Tuple[int, int, StateT]]",
+    message_id: int,
+    submessages: List[Submessage],
+    state: StateT,
+) -> None:
+    """
+    Caches the state as the most recently used, evicting the least recently
+    used state if the cache is full. (_resume_state pops any previous entry,
+    so this is always added at the end.)
+    """
+    cache[message_id] = (len(submessages), submessages[-1]["id"], state)
+    if len(cache) > _STATE_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def _message_id(submessages: List[Submessage]) -> Optional[int]:
+    return submessages[0].get("message_id") if submessages else None
+
+
+def _creation_widget(
+    submessages: List[Submessage], widget_type: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Returns the parsed first submessage, if it creates a widget of the type.
+    """
+    if not submessages:
+        return None
+    content, _, msg_type = _submessage_fields(submessages[0])
+    if msg_type != "widget" or not isinstance(content, str):
+        return None
+    try:
+        widget = _parse_content(content)
+    except ValueError:
+        return None
+    if widget.get("type") is not None or widget.get("widget_type") != widget_type:
+        return None
+    return widget
+
+
+def _create_todo(widget: _TodoWidget, state: _TodoState) -> None:
+    if "extra_data" in widget and widget["extra_data"] is not None:
+        extra_data: Dict[str, Any] = widget["extra_data"]
+        state.title = extra_data.get("task_list_title", "")
+        if state.title == "":
+            state.title = "Task list"
+        for i, task in enumerate(extra_data.get("tasks", [])):
+            state.add_task(f"{i},canned", task["task"], task.get("desc", ""))
+
+
+def _todo_new_task(widget: _TodoWidget, sender_id: int, state: _TodoState) -> None:
+    task_id = f"{widget['key']},{sender_id}"
+    state.add_task(task_id, widget["task"], widget.get("desc", ""))
+
+
+def _todo_strike(widget: _TodoWidget, sender_id: int, state: _TodoState) -> None:
+    key = widget["key"]
+    if not isinstance(key, str):  # Strike keys are always string task ids
+        return
+    index = state.task_index.get(key)
+    if index is not None:
+        state.completed[index] ^= 1
+
+
+def _todo_new_title(widget: _TodoWidget, sender_id: int, state: _TodoState) -> None:
+    state.title = widget.get("title", "")
+
+
+_TODO_HANDLERS: Dict[str, Callable[[_TodoWidget, int, _TodoState], None]] = {
+    "new_task": _todo_new_task,
+    "strike": _todo_strike,
+    "new_task_list_title": _todo_new_title,
+}
+
+
+def _create_poll(widget: _PollWidget, state: _PollState) -> None:
+    state.question = widget["extra_data"]["question"]
+    for i, option in enumerate(widget["extra_data"].get("options", [])):
+        state.add_option(f"canned,{i}", option)
+
+
+def _poll_question(widget: _PollWidget, sender_id: int, state: _PollState) -> None:
+    state.question = widget["question"]
+
+
+def _poll_vote(widget: _PollWidget, sender_id: int, state: _PollState) -> None:
+    index = state.option_index.get(widget["key"])
+    if index is None:
+        return
+
+    # Votes are only ever 1 (add) or -1 (remove), so one comparison suffices
+    if widget["vote"] == 1:
+        state.votes[index][sender_id] = None
+    else:
+        state.votes[index].pop(sender_id, None)
 
-    for entry in todo_list:
-        content = entry["content"]
-        sender_id = entry["sender_id"]
-        msg_type = entry["msg_type"]
 
-        if msg_type == "widget" and isinstance(content, str):
-            raw = json.loads(content)
-            widget = cast(Union[RawTodoWidget, Dict[str, Any]], raw)
+def _poll_new_option(widget: _PollWidget, sender_id: int, state: _PollState) -> None:
+    idx = widget["idx"]
+    state.add_option(f"{sender_id},{idx}", widget["option"])
 
-            if widget.get("widget_type") == "todo":
-                if "extra_data" in widget and widget["extra_data"] is not None:
-                    extra_data = cast(Dict[str, Any], widget["extra_data"])
-                    title = cast(str, extra_data.get("task_list_title", ""))
-                    if title == "":
-                        title = "Task list"
-                    for i, task in enumerate(extra_data.get("tasks", [])):
-                        task_id = f"{i},canned"
-                        tasks[task_id] = {"task": task["task"], "desc": task.get("desc", ""), "completed": False}
 
-            elif widget.get("type") == "new_task":
-                task_id = f"{widget['key']},{sender_id}"
-                tasks[task_id] = {"task": widget["task"], "desc": widget.get("desc", ""), "completed": False}
+_POLL_HANDLERS: Dict[str, Callable[[_PollWidget, int, _PollState], None]] = {
+    "question": _poll_question,
+    "vote": _poll_vote,
+    "new_option": _poll_new_option,
+}
 
-            elif widget.get("type") == "strike":
-                task_id = widget["key"]
-                if task_id in tasks:
-                    tasks[task_id]["completed"] = not tasks[task_id]["completed"]
 
-            elif widget.get("type") == "new_task_list_title":
-                title = cast(str, widget.get("title", ""))
+def _process_widget(
+    submessages: List[Submessage],
+    cache: "OrderedDict[int, Tuple[int, int, StateT]]",
+    new_state: Callable[[], StateT],
+    widget_type: str,
+    create: Callable[[Dict[str, Any], StateT], None],
+    handlers: Mapping[str, Callable[[Dict[str, Any], int, StateT], None]],
+    use_cache: bool,
+) -> StateT:
+    """
+    Returns the state of a widget of the type after processing submessages,
+    applying the creation function for the submessage creating the widget and
+    the handlers by type for other submessages.
+    Processing resumes from the cached state of the widget where possible.
+    """
+    message_id = _message_id(submessages) if use_cache else None
+    resumed = _resume_state(cache, message_id, submessages)
+    if resumed is not None:
+        state, processed = resumed
+    else:
+        state, processed = new_state(), 0
+        # The first submessage usually creates the widget, so is handled
+        # directly; unedited widgets then skip the loop below entirely
+        creation = _creation_widget(submessages, widget_type)
+        if creation is not None:
+            create(creation, state)
+            processed = 1
 
-    return {"title": title, "tasks": tasks}
+    # Names used in the loop are bound locally, as these are faster to look up
+    loads = _parse_content
+    submessage_fields = _submessage_fields
+    get_handler = handlers.get
 
+    for entry in submessages[processed:]:
+        content, sender_id, msg_type = submessage_fields(entry)
+        if msg_type != "widget":
+            continue
+        if not isinstance(content, str):
+            continue
 
-def process_poll_widget(poll_content: List[Submessage]) -> PollWidgetResult:
-    poll_question: str = ""
-    options: Dict[str, PollOption] = {}
+        try:
+            widget: Dict[str, Any] = loads(content)
+        except ValueError:
+            continue  # Invalid content is skipped, like non-widget submessages
 
-    for entry in poll_content:
-        content = entry["content"]
-        sender_id = entry["sender_id"]
-        msg_type = entry["msg_type"]
+        # Only the submessage creating the widget has no type
+        event_type = widget.get("type")
+        if event_type is None:
+            if widget.get("widget_type") == widget_type:
+                create(widget, state)
+            continue
 
-        if msg_type == "widget" and isinstance(content, str):
-            raw = json.loads(content)
-            widget = cast(Union[RawPollWidget, Dict[str, Any]], raw)
+        handler = get_handler(event_type)
+        if handler is not None:
+            handler(widget, sender_id, state)
 
-            if widget.get("widget_type") == "poll":
-                poll_question = widget["extra_data"]["question"]
-                for i, option in enumerate(widget["extra_data"].get("options", [])):
-                    option_id = f"canned,{i}"
-                    options[option_id] = {"option": option, "votes": []}
+    if message_id is not None:
+        _store_state(cache, message_id, submessages, state)
 
-            elif widget.get("type") == "question":
-                poll_question = widget["question"]
+    return state
 
-            elif widget.get("type") == "vote":
-                option_id = widget["key"]
-                vote_type = widget["vote"]
 
-                if option_id in options:
-                    if vote_type == 1 and sender_id not in options[option_id]["votes"]:
-                        options[option_id]["votes"].append(sender_id)
-                    elif vote_type == -1 and sender_id in options[option_id]["votes"]:
-                        options[option_id]["votes"].remove(sender_id)
+def process_todo_widget(
+    todo_list: List[Submessage], use_cache: bool = True
+) -> TodoWidgetResult:
+    state = _process_widget(
+        todo_list,
+        _todo_cache,
+        _TodoState,
+        "todo",
+        _create_todo,
+        _TODO_HANDLERS,
+        use_cache,
+    )
+    return {"title": state.title, "tasks": state.tasks()}
 
-            elif widget.get("type") == "new_option":
-                idx = widget["idx"]
-                new_option = widget["option"]
-                option_id = f"{sender_id},{idx}"
-                options[option_id] = {"option": new_option, "votes": []}
 
-    return {"question": poll_question, "options": options}
+def process_poll_widget(
+    poll_content: List[Submessage], use_cache: bool = True
+) -> PollWidgetResult:
+    state = _process_widget(
+        poll_content,
+        _poll_cache,
+        _PollState,
+        "poll",
+        _create_poll,
+        _POLL_HANDLERS,
+        use_cache,
+    )
+    return {"question": state.question, "options": state.options()}